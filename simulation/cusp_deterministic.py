@@ -13,11 +13,199 @@ stochastic simulation, see tgc_langevin.py.
 
 Usage:
     python simulation/cusp_deterministic.py
+
+Environment variables:
+    TGC_SHOW — set to 1 to show figures interactively (default: save only,
+               rendered with the non-GUI Agg backend)
 """
 
+import math
+import os
+from dataclasses import dataclass, field
+
 import numpy as np
+import matplotlib
+
+# Headless by default; set TGC_SHOW=1 to open interactive windows
+SHOW_FIGURES = os.environ.get('TGC_SHOW', '0') == '1'
+if not SHOW_FIGURES:
+    matplotlib.use(os.environ.get('MPLBACKEND', 'Agg'))
 import matplotlib.pyplot as plt
 
+try:
+    from numba import njit, prange, vectorize
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Fallback decorator: run the kernels as plain Python without numba."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+    def vectorize(*args, **kwargs):
+        """Fallback decorator: broadcast the scalar kernel with np.vectorize."""
+        return lambda fn: np.vectorize(fn, otypes=[float])
+
+
+def _float_dtype(a):
+    """Storage dtype for results derived from a: float32 stays float32, else float64."""
+    return np.float32 if np.asarray(a).dtype == np.float32 else np.float64
+
+
+@njit('float64(float64)', cache=True)
+def _cbrt(v):
+    """Real cube root (math.cbrt is only available from Python 3.11)."""
+    return math.copysign(abs(v) ** (1.0 / 3.0), v)
+
+
+@njit('UniTuple(float64, 3)(float64, float64)', cache=True)
+def _stable_roots(omega, E):
+    """
+    Stable roots of x^3 - Ω·x - E = 0 in closed form, as a 3-tuple
+    with NaN where a root is unstable or does not exist. The upper root
+    comes first.
+    """
+    omega = float(omega)
+    E = float(E)
+    disc = 4 * omega**3 - 27 * E * E
+
+    if omega <= 0 or disc <= 0:
+        # Single real root (Cardano). u takes the sign of E so the sum
+        # does not cancel; the second cube root follows from u*v = Ω/3.
+        u = _cbrt(E / 2 + math.copysign(math.sqrt(-disc / 108), E))
+        r = u + omega / (3 * u) if u != 0 else 0.0
+        return (r if 3 * r * r > omega else np.nan, np.nan, np.nan)
+
+    # Three real roots (trigonometric form)
+    m = 2 * math.sqrt(omega / 3)
+    c = 3 * E / (2 * omega) * math.sqrt(3 / omega)
+    theta = math.acos(min(1.0, max(-1.0, c))) / 3
+    r0 = m * math.cos(theta)
+    r1 = m * math.cos(theta - 2 * math.pi / 3)
+    r2 = m * math.cos(theta - 4 * math.pi / 3)
+
+    # Filter for local minima: d^2V/dx^2 = 3x^2 - Ω > 0
+    return (r0 if 3 * r0 * r0 > omega else np.nan,
+            r1 if 3 * r1 * r1 > omega else np.nan,
+            r2 if 3 * r2 * r2 > omega else np.nan)
+
+
+def cubic_roots_batch(omega, E_array):
+    """
+    Stable roots of x^3 - Ω·x - E = 0 for every E in E_array.
+
+    Vectorized counterpart of _stable_roots: omega and E_array broadcast
+    against each other, and the result has their broadcast shape plus a
+    trailing axis of 3 roots (upper root first, NaN where unstable).
+    """
+    omega, E = np.broadcast_arrays(np.asarray(omega, dtype=float),
+                                   np.asarray(E_array, dtype=float))
+    roots = np.full(E.shape + (3,), np.nan)
+    disc = 4 * omega**3 - 27 * E * E
+
+    # Three real roots (trigonometric form)
+    three = (omega > 0) & (disc > 0)
+    om = omega[three]
+    m = 2 * np.sqrt(om / 3)
+    c = 3 * E[three] / (2 * om) * np.sqrt(3 / om)
+    theta = np.arccos(np.clip(c, -1.0, 1.0)) / 3
+    r = m[:, None] * np.cos(theta[:, None] - 2 * np.pi * np.arange(3) / 3)
+    # Filter for local minima: d^2V/dx^2 = 3x^2 - Ω > 0
+    r[~(3 * r * r > om[:, None])] = np.nan
+    roots[three] = r
+
+    # Single real root (cancellation-free Cardano, as in _stable_roots)
+    one = ~three
+    om = omega[one]
+    E1 = E[one]
+    u = np.cbrt(E1 / 2 + np.copysign(np.sqrt(-disc[one] / 108), E1))
+    r = u.copy()
+    nz = u != 0
+    r[nz] += om[nz] / (3 * u[nz])
+    r[~(3 * r * r > om)] = np.nan
+    roots[one, 0] = r
+    return roots
+
+
+@vectorize(['float32(float32, float32)', 'float64(float64, float64)'], cache=True)
+def beta_of_E(omega, E):
+    """
+    Steady-state gain β(E; Ω) = exp(x*) on the upper branch, where x* is
+    the largest stable root of x^3 - Ω·x - E = 0 (NaN if there is none).
+
+    A NumPy ufunc (when numba is installed): omega and E broadcast over
+    arrays of any shape without a Python loop. The root is solved in
+    float64 for both loops.
+    """
+    # _stable_roots lists the upper root first
+    return math.exp(_stable_roots(omega, E)[0])
+
+
+def hysteresis_area(E_sequence, beta_history):
+    """
+    Hysteresis loop area A = -∮ β dE (trapezoidal rule) for a
+    closed load ramp, ascending then descending. A > 0 when the
+    descending path stays on the upper branch longer than the ascending
+    path. beta_history may be (T,) or (N, T); returns a scalar or (N,).
+    """
+    E = np.asarray(E_sequence, dtype=float)
+    beta = np.asarray(beta_history, dtype=float)
+    return -0.5 * np.sum((beta[..., 1:] + beta[..., :-1]) * np.diff(E), axis=-1)
+
+
+@njit('float64[:](float64[:, :], float64)', cache=True)
+def _select_path(roots, x0):
+    """
+    Minimum-distance selection along a precomputed (n, 3) root table.
+    Returns the adiabatically tracked state x_t^* for every row.
+    """
+    n = roots.shape[0]
+    x_path = np.empty(n)
+    x = x0
+    for t in range(n):
+        best = x
+        best_d = np.inf
+        for k in range(3):
+            r = roots[t, k]
+            if r == r:  # skip NaN (unstable) roots
+                d = (r - x) * (r - x)
+                if d < best_d:
+                    best_d = d
+                    best = r
+        x = best
+        x_path[t] = x
+    return x_path
+
+
+@njit('float64[:, :](float64[:, :, :], float64[:])', parallel=True, cache=True)
+def _select_paths(roots, x0s):
+    """_select_path for N agents' (N, T, 3) root tables, one agent per thread."""
+    x_paths = np.empty((roots.shape[0], roots.shape[1]))
+    for i in prange(roots.shape[0]):
+        x_paths[i] = _select_path(roots[i], x0s[i])
+    return x_paths
+
+
+def run_all_agents(omegas, x0s, E_sequence):
+    """
+    Runs the adiabatic sweep for N independent agents.
+
+    omegas and x0s hold the per-agent Ω and initial state x_0^*
+    (structure-of-arrays). The roots for every (agent, timestep) pair
+    are solved in one broadcast pass; with numba each agent is then
+    tracked on its own thread. Returns the (N, len(E_sequence)) array of
+    beta histories.
+
+    The sweep always computes in float64. float32 is a storage format
+    only: a float32 E_sequence gives float32 histories.
+    """
+    omegas = np.asarray(omegas, dtype=float)
+    roots = cubic_roots_batch(omegas[:, None], np.asarray(E_sequence, dtype=float)[None, :])
+    betas = np.exp(_select_paths(roots, np.asarray(x0s, dtype=float)))
+    return betas.astype(_float_dtype(E_sequence), copy=False)
+
+
 class TGCAgent:
     def __init__(self, omega, name, color):
         """
@@ -32,23 +220,41 @@ class TGCAgent:
         initial_roots = self._get_stable_roots(E=0)
         self.x = max(initial_roots) if initial_roots else 0.0
         
-        self.x_history = []
-        self.beta_history = []
+        # Preallocated history buffers; self._i is the number of filled steps
+        self._x_buf = np.empty(0)
+        self._beta_buf = np.empty(0)
+        self._i = 0
+
+    @property
+    def x_history(self):
+        """Latent state x_t^* per timestep (view into the history buffer)."""
+        return self._x_buf[:self._i]
+
+    @property
+    def beta_history(self):
+        """Decision precision beta_t per timestep (view into the history buffer)."""
+        return self._beta_buf[:self._i]
+
+    def prealloc(self, n):
+        """
+        Reserves history storage for n further timesteps so that
+        update_state writes by index instead of growing a list.
+        """
+        size = self._i + n
+        if size <= len(self._x_buf):
+            return
+        x_buf = np.empty(size)
+        beta_buf = np.empty(size)
+        x_buf[:self._i] = self.x_history
+        beta_buf[:self._i] = self.beta_history
+        self._x_buf = x_buf
+        self._beta_buf = beta_buf
 
     def _get_stable_roots(self, E):
         """
         Solves x^3 - \Omega*x - E = 0 and filters for local minima.
         """
-        # Coefficients for x^3 + 0*x^2 - \Omega*x - E = 0
-        coeffs = [1.0, 0.0, -self.omega, -E]
-        roots = np.roots(coeffs)
-        
-        # Extract purely real roots
-        real_roots = roots[np.isclose(roots.imag, 0)].real
-        
-        # Filter for local minima: d^2V/dx^2 = 3x^2 - \Omega > 0
-        stable_roots = [r for r in real_roots if 3 * r**2 - self.omega > 0]
-        return stable_roots
+        return tuple(r for r in _stable_roots(self.omega, E) if r == r)
 
     def update_state(self, E_t):
         """
@@ -60,19 +266,83 @@ class TGCAgent:
             # Fallback for numerical edge cases
             new_x = self.x 
         else:
-            # argmin_x |x - x_{t-1}^*|
-            distances = [abs(r - self.x) for r in stable_roots]
-            new_x = stable_roots[np.argmin(distances)]
+            # argmin_x (x - x_{t-1}^*)^2 over at most three roots
+            new_x = stable_roots[0]
+            best_d = (new_x - self.x) * (new_x - self.x)
+            for r in stable_roots[1:]:
+                d = (r - self.x) * (r - self.x)
+                if d < best_d:
+                    new_x, best_d = r, d
             
         self.x = new_x
-        self.x_history.append(self.x)
+        if self._i == len(self._x_buf):
+            self.prealloc(max(self._i, 64))
+        self._x_buf[self._i] = self.x
         
         # Link function to strictly positive decision precision (beta)
-        beta_t = np.exp(self.x)
-        self.beta_history.append(beta_t)
+        beta_t = math.exp(self.x)
+        self._beta_buf[self._i] = beta_t
+        self._i += 1
         
         return beta_t
 
+    def run_sequence(self, E_sequence):
+        """
+        Applies update_state over a whole input-drive sequence.
+
+        The stable roots depend only on E_t, so they are solved for the
+        full sequence in one vectorized pass; only the path-dependent
+        minimum-distance selection runs step by step, in a numba kernel
+        when numba is installed.
+        """
+        x_path = _select_path(cubic_roots_batch(self.omega, E_sequence), float(self.x))
+        beta_path = np.exp(x_path)
+
+        n = len(x_path)
+        if n:
+            self.x = x_path[-1]
+        self.prealloc(n)
+        self._x_buf[self._i:self._i + n] = x_path
+        self._beta_buf[self._i:self._i + n] = beta_path
+        self._i += n
+
+        return beta_path
+
+@dataclass
+class AgentPool:
+    """
+    Structure-of-arrays form of several TGC agents for the CFP sweep.
+
+    omega        : (N,) stability factors
+    x            : (N,) current latent states x_t^*
+    beta_history : (N, T) decision precision per agent and timestep
+                   (float32 when the E sequence is float32)
+    """
+    omega: np.ndarray
+    x: np.ndarray
+    beta_history: np.ndarray = field(default_factory=lambda: np.empty((0, 0)))
+
+    @classmethod
+    def from_agents(cls, agents):
+        """Collects the Ω and current state of TGCAgent objects."""
+        return cls(omega=np.array([agent.omega for agent in agents], dtype=float),
+                   x=np.array([agent.x for agent in agents], dtype=float))
+
+    def run(self, E_sequence):
+        """
+        Runs every agent through E_sequence with run_all_agents and
+        returns the (N, T) beta history.
+
+        The roots are solved for all agents and timesteps in one
+        broadcast pass. The state-dependent selection then walks each
+        agent's path in turn: compiled and one thread per agent with
+        numba, a plain Python loop without it.
+        """
+        self.beta_history = run_all_agents(self.omega, self.x, E_sequence)
+        if self.beta_history.shape[1]:
+            self.x = np.log(self.beta_history[:, -1])
+        return self.beta_history
+
 def run_catastrophe_forcing_protocol():
     """
     Simulates the 'Stress Ramp' to empirically demonstrate Hysteresis (A > 0)
@@ -92,22 +362,29 @@ def run_catastrophe_forcing_protocol():
     
     # 2. Construct the CFP "Stress Ramp" (Input Drive E)
     # Ramping up from -4.0 to 4.0, then ramping back down to -4.0
-    E_ascending = np.linspace(-4.0, 4.0, 200)
-    E_descending = np.linspace(4.0, -4.0, 200)
-    E_sequence = np.concatenate([E_ascending, E_descending])
+    # (stored as float32: the dynamics are only resolved to ~1%).
+    # The descending half is the mirrored ascending half, written in place.
+    n_ramp = 200
+    E_sequence = np.empty(2 * n_ramp, dtype=np.float32)
+    E_sequence[:n_ramp] = np.linspace(-4.0, 4.0, n_ramp, dtype=np.float32)
+    E_sequence[n_ramp:] = E_sequence[n_ramp - 1::-1]
+    E_ascending = E_sequence[:n_ramp]
+    E_descending = E_sequence[n_ramp:]
     
-    # 3. Run Simulation
-    for agent in agents:
-        for E_t in E_sequence:
-            agent.update_state(E_t)
+    # 3. Run Simulation (all agents stepped together as one pool)
+    pool = AgentPool.from_agents(agents)
+    beta_histories = pool.run(E_sequence)
             
     # 4. Visualization
-    plt.figure(figsize=(12, 7))
+    fig = plt.figure(figsize=(12, 7))
+    
+    # Theoretical critical points E_crit = sqrt(4*\Omega^3/27), all agents at once
+    E_crits = np.sqrt(4 * np.clip(pool.omega, 0, None)**3 / 27)
     
-    for agent in agents:
+    for agent, beta_history, E_crit in zip(agents, beta_histories, E_crits):
         # Split history into Ascending and Descending phases for plotting
-        beta_asc = agent.beta_history[:len(E_ascending)]
-        beta_desc = agent.beta_history[len(E_ascending):]
+        beta_asc = beta_history[:len(E_ascending)]
+        beta_desc = beta_history[len(E_ascending):]
         
         # Plot ascending path (solid line)
         plt.plot(E_ascending, beta_asc, color=agent.color, linestyle='-', linewidth=2.5, 
@@ -119,7 +396,6 @@ def run_catastrophe_forcing_protocol():
         
         # Mark Theoretical Critical Points if bistable
         if agent.omega > 0:
-            E_crit = np.sqrt((4 * agent.omega**3) / 27)
             if E_crit <= 4.0:
                 plt.axvline(x=E_crit, color=agent.color, linestyle=':', alpha=0.5)
                 plt.axvline(x=-E_crit, color=agent.color, linestyle=':', alpha=0.5)
@@ -133,7 +409,9 @@ def run_catastrophe_forcing_protocol():
     
     # Save for GitHub README
     plt.savefig("figure1.png", dpi=300)
-    plt.show()
+    if SHOW_FIGURES:
+        plt.show()
+    plt.close(fig)
 
 if __name__ == "__main__":
     run_catastrophe_forcing_protocol()
\ No newline at end of file
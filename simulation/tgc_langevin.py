@@ -13,9 +13,22 @@ Generates:
 
 Usage:
     python simulation/tgc_langevin.py
+
+Environment variables:
+    TGC_SHOW — set to 1 to show figures interactively (default: save only,
+               rendered with the non-GUI Agg backend)
 """
 
+import math
+import os
+
 import numpy as np
+import matplotlib
+
+# Headless by default; set TGC_SHOW=1 to open interactive windows
+SHOW_FIGURES = os.environ.get('TGC_SHOW', '0') == '1'
+if not SHOW_FIGURES:
+    matplotlib.use(os.environ.get('MPLBACKEND', 'Agg'))
 import matplotlib.pyplot as plt
 from matplotlib.gridspec import GridSpec
 
@@ -34,14 +47,25 @@ def cusp_drift(beta, omega, E):
     return -(beta**3 - omega * beta - E)
 
 
-def langevin_step(beta, omega, E, sigma, dt):
-    """Single Euler–Maruyama step for the TGC Langevin equation."""
+def langevin_step(beta, omega, E, sigma, dt, z=None, rng=None):
+    """
+    Single Euler–Maruyama step for the TGC Langevin equation.
+
+    z is the standard-normal increment; if None it is drawn here from rng
+    (a fresh np.random.default_rng() if that is None too). Loops should
+    pre-draw all increments with rng.standard_normal(n_steps) and pass
+    them in.
+    """
     drift = cusp_drift(beta, omega, E)
-    noise = sigma * np.sqrt(dt) * np.random.randn()
+    if z is None:
+        if rng is None:
+            rng = np.random.default_rng()
+        z = rng.standard_normal()
+    noise = sigma * math.sqrt(dt) * z
     return beta + drift * dt + noise
 
 
-def simulate_trajectory(omega, E_sequence, sigma, dt=0.01, beta0=None):
+def simulate_trajectory(omega, E_sequence, sigma, dt=0.01, beta0=None, rng=None):
     """
     Simulate a full TGC trajectory under a time-varying E sequence.
 
@@ -57,22 +81,28 @@ def simulate_trajectory(omega, E_sequence, sigma, dt=0.01, beta0=None):
         Integration timestep.
     beta0 : float or None
         Initial gain state. If None, starts at upper stable root for E=0.
+    rng : np.random.Generator or None
+        Source of the noise increments, e.g. np.random.default_rng(42).
+        If None, a fresh unseeded Generator is used.
 
     Returns
     -------
     beta_traj : np.ndarray
         Trajectory of latent gain state β.
     """
+    if rng is None:
+        rng = np.random.default_rng()
     if beta0 is None:
         beta0 = np.sqrt(omega) if omega > 0 else 0.0
 
     n_steps = len(E_sequence)
     beta_traj = np.zeros(n_steps)
     beta_traj[0] = beta0
+    z = rng.standard_normal(n_steps - 1)
 
     for t in range(1, n_steps):
         beta_traj[t] = langevin_step(
-            beta_traj[t - 1], omega, E_sequence[t], sigma, dt
+            beta_traj[t - 1], omega, E_sequence[t], sigma, dt, z[t - 1]
         )
     return beta_traj
 
@@ -90,9 +120,10 @@ def plot_langevin_trajectories():
     sigma = 0.15
     n_ramp = 2000
 
-    E_asc = np.linspace(-2.0, 3.0, n_ramp)
-    E_desc = np.linspace(3.0, -2.0, n_ramp)
-    E_full = np.concatenate([E_asc, E_desc])
+    # Ascending ramp followed by its mirror image, written in place
+    E_full = np.empty(2 * n_ramp)
+    E_full[:n_ramp] = np.linspace(-2.0, 3.0, n_ramp)
+    E_full[n_ramp:] = E_full[n_ramp - 1::-1]
 
     omegas = [0.5, 1.5, 3.0]
     labels = ["Low Ω (0.5)", "Mid Ω (1.5)", "High Ω (3.0)"]
@@ -108,8 +139,8 @@ def plot_langevin_trajectories():
     for ax, omega, label, color in zip(axes, omegas, labels, colors):
         # Run 5 stochastic replicates
         for rep in range(5):
-            np.random.seed(42 + rep)
-            traj = simulate_trajectory(omega, E_full, sigma, dt)
+            rng = np.random.default_rng(42 + rep)
+            traj = simulate_trajectory(omega, E_full, sigma, dt, rng=rng)
             alpha = 0.8 if rep == 0 else 0.25
             ax.plot(E_full, traj, color=color, alpha=alpha, lw=0.6)
 
@@ -127,7 +158,9 @@ def plot_langevin_trajectories():
     axes[0].set_ylabel("Neural Gain (β)", fontsize=10)
     plt.tight_layout()
     plt.savefig("figures/fig_langevin_trajectories.png", dpi=300)
-    plt.show()
+    if SHOW_FIGURES:
+        plt.show()
+    plt.close(fig)
     print("✅ Saved: figures/fig_langevin_trajectories.png")
 
 
@@ -153,12 +186,13 @@ def plot_overheating_demo():
         np.full(2000, 0.5),
     ])
 
-    np.random.seed(123)
+    rng = np.random.default_rng(123)
     beta = np.sqrt(omega)
     traj = np.zeros(n_steps)
+    z = rng.standard_normal(n_steps)
     for t in range(n_steps):
         traj[t] = beta
-        beta = langevin_step(beta, omega, E_constant, sigma_escalation[t], dt)
+        beta = langevin_step(beta, omega, E_constant, sigma_escalation[t], dt, z[t])
 
     time = np.arange(n_steps) * dt
 
@@ -181,7 +215,9 @@ def plot_overheating_demo():
 
     plt.tight_layout()
     plt.savefig("figures/fig_overheating_demo.png", dpi=300)
-    plt.show()
+    if SHOW_FIGURES:
+        plt.show()
+    plt.close(fig)
     print("✅ Saved: figures/fig_overheating_demo.png")
 
 
@@ -200,12 +236,13 @@ def plot_stationary_distribution():
     sigma = 0.25
     n_steps = 200000
 
-    np.random.seed(77)
+    rng = np.random.default_rng(77)
     beta = 1.0
     samples = np.zeros(n_steps)
+    z = rng.standard_normal(n_steps)
     for t in range(n_steps):
         samples[t] = beta
-        beta = langevin_step(beta, omega, E, sigma, dt)
+        beta = langevin_step(beta, omega, E, sigma, dt, z[t])
 
     # Discard burn-in
     samples = samples[10000:]
@@ -235,7 +272,9 @@ def plot_stationary_distribution():
 
     plt.tight_layout()
     plt.savefig("figures/fig_stationary_bistability.png", dpi=300)
-    plt.show()
+    if SHOW_FIGURES:
+        plt.show()
+    plt.close(fig)
     print("✅ Saved: figures/fig_stationary_bistability.png")
 
 
@@ -244,7 +283,6 @@ def plot_stationary_distribution():
 # ══════════════════════════════════════════════
 
 if __name__ == "__main__":
-    import os
     os.makedirs("figures", exist_ok=True)
 
     print("=" * 60)